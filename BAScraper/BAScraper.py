@@ -3,19 +3,29 @@ import time
 import logging
 import json
 import re
+import random
 
 from dataclasses import dataclass
 from typing import List
 from datetime import datetime
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from queue import Queue
+from itertools import chain
+from queue import Queue, Empty
 
 import os
-from threading import Lock, RLock
-import pprint
+from threading import Event, Lock, Timer
 import warnings
-pretty = pprint.PrettyPrinter(indent=4).pprint
+
+# orjson is optional (`pip install BAScraper[fast]`), it parses the raw response bytes a lot faster.
+# `orjson.JSONDecodeError` subclasses `json.JSONDecodeError` so the same except clause covers both.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# `[deleted]`, `[Removed by Reddit]` etc. compiled once, `is_deleted` runs for every dupe
+DELETED_PATTERN = re.compile(r"\[.*\]")
 
 # imports no longer used
 # from dotenv import load_dotenv
@@ -30,6 +40,12 @@ class Creds:
 
 
 class Pushpull:
+    # accepted values for the checked params, frozen once for O(1) membership tests on every call
+    PACE_MODES = frozenset({'auto-soft', 'auto-hard', 'manual'})
+    DUPLICATE_ACTIONS = frozenset({'newest', 'oldest', 'remove', 'keep_original', 'keep_removed'})
+    SORTS = frozenset({'desc', 'asc'})
+    SORT_TYPES = frozenset({'created_utc', 'score', 'num_comments'})
+
     def __init__(self,
                  creds: List[Creds] = None,
                  sleepsec=1,
@@ -40,7 +56,7 @@ class Pushpull:
                  comment_t=None,
                  batch_size=0,
                  log_level='INFO',
-                 cwd=os.getcwd(),
+                 cwd=None,
                  pace_mode='auto-hard'):
 
         """
@@ -66,21 +82,33 @@ class Pushpull:
 
         # variables for managing rate limits
         # rate limit as of feb 9th 2023
-        assert pace_mode in ['auto-soft', 'auto-hard', 'manual']
+        assert pace_mode in self.PACE_MODES
         self.max_pool_amount_soft = 15
         self.max_pool_amount_hard = 30
         self.refill_second = 60
-        self.last_refilled = time.time()
+        self.last_refilled = time.monotonic()  # pacing clock, unaffected by wall-clock (NTP/DST) jumps
+        self.next_allowed = self.last_refilled  # earliest time the next paced request may go out
         self.pace_mode = pace_mode  # auto by default
-        if pace_mode == 'auto-soft':
-            self.max_pool_amount = self.max_pool_amount_soft
-        elif pace_mode == 'auto-hard':
-            self.max_pool_amount = self.max_pool_amount_hard
+        # `manual` doesn't draw from the pool, it only keeps the hard limit around for the pool bookkeeping
+        self.max_pool_amount = self.max_pool_amount_soft if pace_mode == 'auto-soft' else self.max_pool_amount_hard
+        # pacing function per `pace_mode`, looked up on every request instead of re-matching the mode string
+        self.pacers = {'auto-soft': self._pool_sleep, 'auto-hard': self._pool_sleep, 'manual': self._manual_sleep}
+        # picks which version of a duplicated post/comment to keep (`None` drops it), per `duplicate_action`
+        # for keep_original/keep_removed the last matching version wins, so scan from the back and stop at the first hit
+        self.dupe_resolvers = {
+            'newest': lambda versions: versions[0],
+            'oldest': lambda versions: versions[-1],
+            'remove': lambda versions: None,
+            'keep_original': lambda versions: next((v for v in reversed(versions) if not self.is_deleted(v)), None),
+            'keep_removed': lambda versions: next((v for v in reversed(versions) if self.is_deleted(v)), None),
+        }
         self.pool_amount = self.max_pool_amount
-        self.throttling = False  # needed this since the threads can't get out of throttled state
-        # (needs shared throttled/not-throttled state)
-        self.pool_lock = RLock()
-        self.throttle_lock = RLock()
+        self.refill_rate = self.max_pool_amount / self.refill_second  # pool slots regained per second
+        self.pool_lock = Lock()  # never re-entered (the pacer loops instead of recursing), a plain lock is enough
+        # cleared while a worker waits out a 429, every worker blocks on it before sending a request
+        self.rate_limit_clear = Event()
+        self.rate_limit_clear.set()
+        self.cooldown_lock = Lock()
 
         self.sleepsec = sleepsec  # cooldown per request
         self.backoffsec = backoffsec  # backoff amount after error happens in request
@@ -92,75 +120,158 @@ class Pushpull:
 
         self.submission_url = 'https://api.pullpush.io/reddit/search/submission/'
         self.comment_url = 'https://api.pullpush.io/reddit/search/comment/'
+        self.urls = {'submission': self.submission_url, 'comment': self.comment_url}  # per `mode`
 
-        self.cwd = cwd
-
-        # google custom search engine creds
-        try:
-            self.cse_id = creds.CSE_ID
-            self.cse_api = creds.CSE_API_KEY
-            print('CSE credentials detected.')
+        # one session shared by every worker thread so connections (and TLS) are kept alive and reused
+        self.session = requests.Session()
+        # urllib3 keeps only 10 connections per host by default, size the pool to the worker count
+        # so threads past the 10th don't open (and throw away) a fresh connection on every request
+        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=max(self.threads, self.comment_t)))
 
-        except (NameError, AttributeError):
-            print("no CSE credentials detected. you'll need it to use the Google Custom Search Engine")
+        self.cwd = cwd if cwd is not None else os.getcwd()  # resolved per instance, not once at import
 
         self.logger = logging.getLogger('BAlogger')
         self.logger.setLevel(logging.DEBUG)
 
-        logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s:%(message)s',
-                            filename=os.path.join(self.cwd, 'scrape_log.log'),
-                            filemode='w',
-                            level=logging.DEBUG)
+        # only the first instance sets up the log file, basicConfig is a no-op after that anyway
+        if not logging.root.handlers:
+            logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s:%(message)s',
+                                filename=os.path.join(self.cwd, 'scrape_log.log'),
+                                filemode='w',
+                                level=logging.DEBUG)
 
         assert log_level in ['NOTSET', 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'], \
             '`log_level` should be a string representation of logging level such as `INFO`'
 
         # create console handler and set level
-        ch = logging.StreamHandler()
+        # the logger is global, so reuse the handler a previous instance attached
+        # instead of adding another one and printing every message once more per instance
+        ch = next((h for h in self.logger.handlers if h.get_name() == 'BAconsole'), None)
+        if ch is None:
+            ch = logging.StreamHandler()
+            ch.set_name('BAconsole')
+            ch.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
+            self.logger.addHandler(ch)
         ch.setLevel(log_level)  # CHANGE HERE TO CONTROL DISPLAYED LOG MESSAGE LEVEL
-        ch.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
-        self.logger.addHandler(ch)
+
+        # google custom search engine creds
+        try:
+            self.cse_id = creds.CSE_ID
+            self.cse_api = creds.CSE_API_KEY
+            self.logger.debug('CSE credentials detected.')
+
+        except (NameError, AttributeError):
+            self.logger.debug("no CSE credentials detected. you'll need it to use the Google Custom Search Engine")
+
+    def close(self):
+        # releases the pooled connections held by the shared session
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def request_sleep(self, thread_no=None, sleepsec=None):
         sleepsec = self.sleepsec if sleepsec is None else sleepsec
 
-        match self.pace_mode:
-            case 'auto-soft' | 'auto-hard':
-                self.pool_lock.acquire()
-                if time.time() - self.last_refilled > self.refill_second:
-                    self.pool_amount = self.max_pool_amount
-                    self.last_refilled = time.time()
-                    self.logger.info(f't-{thread_no}: pool refilled!')
+        pacer = self.pacers.get(self.pace_mode)
+        if pacer is None:
+            raise Exception(f'{thread_no}: Wrong variable for `mode`!')
+        pacer(thread_no, sleepsec)
 
-                if self.pool_amount > 0:
-                    time.sleep(sleepsec)
+    def _pool_sleep(self, thread_no, sleepsec):
+        # token bucket: the pool refills continuously at `max_pool_amount` per `refill_second`
+        # instead of all at once every `refill_second`, so it doesn't burst then stall for the rest of the minute
+        while True:
+            with self.pool_lock:
+                now = time.monotonic()
+                self.pool_amount = min(self.max_pool_amount,
+                                       self.pool_amount + (now - self.last_refilled) * self.refill_rate)
+                self.last_refilled = now
+
+                if self.pool_amount >= 1:
                     self.pool_amount -= 1
-                    self.pool_lock.release()
-                    return
+                    # book the next `sleepsec`-spaced slot and sleep *after* releasing the lock,
+                    # so one thread's (backoff) sleep doesn't hold up every other thread's bookkeeping
+                    slot = max(now, self.next_allowed) + self.sleepsec
+                    self.next_allowed = slot
+                    delay = max(slot, now + sleepsec) - now
+                    break
 
-                else:
-                    self.pool_lock.release()
-                    with self.throttle_lock:
-                        self.throttling = True
-                        s = self.refill_second - (time.time() - self.last_refilled)
-                        self.logger.info(f't-{thread_no}: soft/hard limit reached! throttling for {s}...')
-                        self.logger.info(f'sleeping for {s}sec')
-                        time.sleep(s)
-                        '''
-                        while True:
-                            if (time.time() - self.last_refilled > self.refill_second) or not self.throttling:
-                                self.throttling = False
-                                break
-                            time.sleep(1)
-                        '''
-                    self.request_sleep(thread_no)
-
-            case 'manual':
-                time.sleep(sleepsec)
+                s = (1 - self.pool_amount) / self.refill_rate  # time until the next whole slot
+
+            self.logger.info('t-%s: soft/hard limit reached! throttling for %.2fsec...', thread_no, s)
+            time.sleep(s)
+
+        time.sleep(delay)
+
+    @staticmethod
+    def _manual_sleep(thread_no, sleepsec):
+        time.sleep(sleepsec)
+
+    def backoff(self, retries):
+        # full jitter: anywhere between 0 and the exponential backoff (capped at one refill window),
+        # so threads that failed together don't all retry at the same moment
+        return random.uniform(0, min(self.refill_second, self.backoffsec * 2 ** (retries - 1)))
+
+    def sync_pool(self, headers):
+        # if the server tells us how many requests are left, trust that over our own count
+        # (other clients on the same IP eat into the same budget). no-op when the headers aren't sent
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        try:
+            remaining = float(remaining)
+        except ValueError:
+            return
+        # `remaining` already counts the request that just finished, but the pacer (`request_sleep`, called right
+        # after this) takes a token for that same request too. +1 so it isn't counted twice
+        with self.pool_lock:
+            self.pool_amount = min(self.pool_amount, remaining + 1)
+
+    def reset_wait(self, headers, retries):
+        # wait out the server's own reset time when it's given, otherwise the usual backoff
+        try:
+            reset = float(headers.get('X-RateLimit-Reset'))
+        except (TypeError, ValueError):
+            return self.backoffsec * retries
+        if reset != reset:  # 'nan' parses fine but can't be waited on
+            return self.backoffsec * retries
+        # some APIs send the reset as an epoch timestamp rather than seconds left
+        if reset > 1_000_000_000:
+            reset -= time.time()
+        # capped at one refill window (same as `backoff`), a bogus value shouldn't hold every worker forever
+        return min(max(reset, 0), self.refill_second)
+
+    def cooldown(self, thread_no=None, sleepsec=None):
+        # only the first worker to hit the rate limit starts the cooldown, everyone waits on `rate_limit_clear`
+        # instead of each running into their own 429 and stacking up separate sleeps
+        with self.cooldown_lock:
+            if not self.rate_limit_clear.is_set():
                 return
+            self.rate_limit_clear.clear()
+
+        sleepsec = self.backoffsec if sleepsec is None else sleepsec
+        self.logger.warning('t-%s: rate limited! pausing all requests for %ssec...', thread_no, sleepsec)
+        # the timer reopens the gate, so this thread goes back to waiting on it like everyone else
+        # instead of sleeping here and then waiting again at the top of the retry loop
+        timer = Timer(sleepsec, self._end_cooldown)
+        timer.daemon = True
+        timer.start()
+
+    def _end_cooldown(self):
+        with self.pool_lock:
+            # the pacer starts from an empty pool, so once the jittered first requests are out
+            # everyone continues at the refill rate instead of bursting straight back into the limit
+            self.pool_amount = 0
+        self.rate_limit_clear.set()
 
-            case _:
-                raise Exception(f'{thread_no}: Wrong variable for `mode`!')
+    @staticmethod
+    def _prune_params(params: dict) -> dict:
+        # remove empty param values, so only the set ones are validated and sent
+        return {k: v for k, v in params.items() if v}
 
     # TODO: make it so that when `ids` field is used,
     #  try to use `_make_request_from_queued_id` function for large batches
@@ -188,6 +299,10 @@ class Pushpull:
                         spoiler: bool = None,
                         contest_mode: bool = None) -> dict:
 
+        # checked up front, `preprocess_json` only runs once the whole scrape is done
+        assert duplicate_action in self.DUPLICATE_ACTIONS, \
+            "`duplicate_action` should be one of ['newest', 'oldest', 'remove', 'keep_original', 'keep_removed']"
+
         if after and before:
             assert isinstance(after, datetime) and isinstance(before, datetime), \
                 '`after` and `before` needs to be a `datetime` instance'
@@ -214,8 +329,7 @@ class Pushpull:
             'spoiler': pb(spoiler),
             'contest_mode': pb(contest_mode),
         }
-        # remove empty param values
-        params = {k: v for k, v in params.items() if v}
+        params = self._prune_params(params)
 
         # check params
         check_result = self._check_params(**params)
@@ -241,38 +355,43 @@ class Pushpull:
         if get_comments:
             self.logger.info('starting comment fetching...')
             post_ids = Queue()
-            [post_ids.put(post['id']) for post in submission_responses.values()]  # create a Queue of post_id
+            for post in submission_responses.values():  # create a Queue of post_id (unbounded, never blocks)
+                post_ids.put_nowait(post['id'])
             s = time.time()
-            with ThreadPoolExecutor() as executor:
+            with ThreadPoolExecutor(max_workers=self.comment_t) as executor:
                 futures = list()
                 for i in range(self.comment_t):
-                    self.logger.debug(f'started thread no.{i}')
+                    self.logger.debug('started thread no.%s', i)
                     futures.append(executor.submit(self._make_request_from_queued_id, q=post_ids,
                                                    params={}, thread_id=i, mode='comment', q_type='link_id'))
                     time.sleep(.5)
 
-                for submission_id in submission_responses:  # create the comments entry and initialize it to empty list
-                    submission_responses[submission_id]['comments'] = list()
-
                 dupes_list = list()
+                comment_groups = dict()  # submission id -> its comments, attached to the submissions in one pass below
 
                 for future in as_completed(futures):
                     # futures.as_completed will hold the main thread until all threads are complete
                     comment_response, thread_id = future.result()
-                    self.logger.debug(f't-{thread_id}: writing comments to data')
+                    self.logger.debug('t-%s: writing comments to data', thread_id)
                     comment_response, comment_dupes = self.preprocess_json(comment_response, duplicate_action)
                     for comments in comment_response.values():
-                        submission_responses[comments['link_id'][3:]]['comments'].append(comments)
+                        comment_groups.setdefault(comments['link_id'][3:], list()).append(comments)
                     dupes_list.append(comment_dupes)
 
+                for submission_id, submission in submission_responses.items():  # empty list if no comments came back
+                    submission['comments'] = comment_groups.get(submission_id, list())
+
                 with open(os.path.join(self.cwd, 'dupe_comments_under_submissions.json'), 'w') as f:
                     json.dump(dupes_list, f, indent=4)
 
-            self.logger.info(f'comment fetching time: {time.time() - s}sec')
+            self.logger.info('comment fetching time: %ssec', time.time() - s)
 
         # filtering - also includes the 'comments' field in case comments were scraped.
-        submission_responses = {post_id: {k: v[k] for k in filters + ['comments'] if k in v} for post_id, v in
-                                submission_responses.items()} if filters else submission_responses
+        # field list built once, not re-concatenated for every post
+        if filters:
+            fields = filters + ['comments']
+            submission_responses = {post_id: {k: v[k] for k in fields if k in v} for post_id, v in
+                                    submission_responses.items()}
 
         return submission_responses
 
@@ -290,6 +409,10 @@ class Pushpull:
                      subreddit=None,
                      link_id=None) -> dict:
 
+        # checked up front, `preprocess_json` only runs once the whole scrape is done
+        assert duplicate_action in self.DUPLICATE_ACTIONS, \
+            "`duplicate_action` should be one of ['newest', 'oldest', 'remove', 'keep_original', 'keep_removed']"
+
         if after and before:
             assert isinstance(after, datetime) and isinstance(before, datetime), \
                 '`after` and `before` needs to be a `datetime` instance'
@@ -306,6 +429,7 @@ class Pushpull:
             'before': round(before.timestamp()) if before else None,
             'link_id': link_id,
         }
+        params = self._prune_params(params)
 
         # check params
         check_result = self._check_params(**params)
@@ -336,27 +460,53 @@ class Pushpull:
     def _make_request(self, mode, params, thread_id=0, headers=None) -> list:
         # `after` is inclusive, `before` is exclusive here
 
-        assert mode in ['submission', 'comment'], "`mode` should be one of ['submission', 'comment']"
-        url = self.submission_url if mode == 'submission' else self.comment_url
+        url = self.urls.get(mode)
+        assert url is not None, "`mode` should be one of ['submission', 'comment']"
 
         headers = dict() if not headers else headers
 
+        # shift `after` on a copy so the caller's params (reused for every page and retry) don't drift
+        if params.get('after') is not None:
+            params = {**params, 'after': params['after'] - 1}
+
         retries = 0
+        failure = None  # set when the server itself answered badly, see the end of the loop
         while retries < self.max_retries:
+            if not self.rate_limit_clear.is_set():
+                self.rate_limit_clear.wait()
+                # every worker blocked on the gate wakes up at the same moment when it reopens,
+                # so spread their first requests out instead of sending them all at once
+                time.sleep(self.backoff(max(retries, 1)))
             try:
-                if 'after' in params:
-                    params['after'] = params['after']-1
-
-                response = requests.get(url, params=params, headers=headers, timeout=self.timeout)
-                result = response.json()['data']
-
-                if response.ok:
-                    with self.pool_lock:
-                        self.logger.info(
-                            f"t-{thread_id}: pool: {self.pool_amount} | len: {len(result)} | time: {response.elapsed}")
-                else:
-                    self.logger.error(f"t-{thread_id}: {response.status_code} - {response.elapsed}"
-                                      f"\n{response.text}\n")
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                if response.status_code == 429:
+                    retries += 1
+                    failure = f'rate limited (429):\n{response.text[:1000]}'
+                    self.cooldown(thread_id, self.reset_wait(response.headers, retries))
+                    continue
+
+                # check the status before touching the body, error responses don't carry `data`
+                # lazy %-style args: nothing is formatted when the level is filtered out
+                if not response.ok:
+                    self.logger.error("t-%s: %s - %s\n%s\n",
+                                      thread_id, response.status_code, response.elapsed, response.text)
+                    response.raise_for_status()  # 5xx is retried below, any other 4xx is raised as is
+
+                parsed = json_loads(response.content)  # body is parsed exactly once
+                # explicit check rather than a KeyError, a 200 without `data` is a bad page worth retrying
+                if not isinstance(parsed, dict) or 'data' not in parsed:
+                    retries += 1
+                    failure = f'response has no `data` field:\n{response.text[:1000]}'
+                    self.logger.warning("t-%s: response has no `data` field: Retrying... Attempt %d/%d",
+                                        thread_id, retries, self.max_retries)
+                    self.request_sleep(thread_id, self.backoff(retries))
+                    continue
+                result = parsed['data']
+                self.sync_pool(response.headers)
+
+                # the pool count is only read for the log, so no need to hold `pool_lock` for it
+                self.logger.info("t-%s: pool: %d | len: %s | time: %s",
+                                 thread_id, self.pool_amount, len(result), response.elapsed)
 
                 self.request_sleep(thread_id)
                 return result
@@ -364,21 +514,34 @@ class Pushpull:
             except (requests.exceptions.Timeout,
                     requests.exceptions.ConnectionError,
                     requests.exceptions.HTTPError) as err:
+                # a 4xx (429 is handled above) means the request itself is bad, retrying won't change that
+                # and returning an empty page would look like the end of the data to the paging workers
+                if isinstance(err, requests.exceptions.HTTPError) and err.response is not None \
+                        and err.response.status_code < 500:
+                    raise Exception(f't-{thread_id}: request rejected with {err.response.status_code}, '
+                                    f'not retrying:\n{err.response.text}') from err
                 retries += 1
-                self.logger.warning(
-                    f"t-{thread_id}: {err}\nRetrying... Attempt {retries}/{self.max_retries}")
-                self.request_sleep(thread_id, self.backoffsec * retries)  # backoff
+                failure = str(err) if isinstance(err, requests.exceptions.HTTPError) else None
+                self.logger.warning("t-%s: %s\nRetrying... Attempt %d/%d", thread_id, err, retries, self.max_retries)
+                self.request_sleep(thread_id, self.backoff(retries))
 
             except json.decoder.JSONDecodeError:
                 retries += 1
-                self.logger.warning(
-                    f"t-{thread_id}: JSONDecodeError: Retrying... Attempt {retries}/{self.max_retries}")
-                self.request_sleep(thread_id, self.backoffsec * retries)  # backoff
+                failure = 'response body is not valid JSON'
+                self.logger.warning("t-%s: JSONDecodeError: Retrying... Attempt %d/%d",
+                                    thread_id, retries, self.max_retries)
+                self.request_sleep(thread_id, self.backoff(retries))
 
             except Exception as err:
                 raise Exception(f't-{thread_id}: unexpected error: {err}')
 
-        self.logger.error(f't-{thread_id}: failed request attempt. skipping...')
+        # an empty list reads as "no more data" to the paging workers, so only fall back to it for
+        # connection problems (timeouts etc.). a server that kept sending errors or malformed pages fails loudly
+        # instead of silently cutting the results short
+        if failure is not None:
+            raise Exception(f't-{thread_id}: giving up after {self.max_retries} attempts: {failure}')
+
+        self.logger.error('t-%s: failed request attempt. skipping...', thread_id)
         return list()
 
     def _timeframe_multithreader(self, mode, after, before, sort, params):
@@ -389,14 +552,16 @@ class Pushpull:
         responses = [None for _ in range(self.threads)]
         s = time.time()
 
-        with ThreadPoolExecutor() as executor:
+        # size the pool to the split so every timeframe gets its own worker right away
+        # (the default pool size is CPU-based and can leave splits queued behind the others)
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
             futures = []
             for i in range(self.threads):
                 thread_params = dict(params)  # make a shallow copy for thread safety
                 thread_params['after'] = round(splitpoints[i].timestamp())
                 thread_params['before'] = round(splitpoints[i + 1].timestamp())
-                self.logger.info(f"started thread no.{i} | {datetime.fromtimestamp(thread_params['before'])} <- "
-                                 f"{datetime.fromtimestamp(thread_params['after'])}")
+                # the split points are already datetimes, no need to convert the epochs back for the log
+                self.logger.info("started thread no.%s | %s <- %s", i, splitpoints[i + 1], splitpoints[i])
                 time.sleep(1)
                 futures.append(executor.submit(self._make_request_from_timeframe,
                                                mode=mode, params=thread_params, thread_id=i))
@@ -412,17 +577,13 @@ class Pushpull:
                 else:
                     raise Exception(f'Unexpected value for `sort`: {sort}')
 
-        # de-nest the response
-        denested_responses = list()
+        # de-nest the response in a single pass over the (already ordered) batches
         for i, batch in enumerate(responses):
             if batch is None:
-                self.logger.error(f'empty response for batch no.{i}! - possible omitted JSON data')
-            else:
-                denested_responses.extend(batch)
+                self.logger.error('empty response for batch no.%s! - possible omitted JSON data', i)
+        denested_responses = list(chain.from_iterable(batch for batch in responses if batch is not None))
 
-        # denested_responses = [post for batch in responses for post in batch]
-
-        self.logger.info(f'{mode} fetching time: {time.time() - s}sec')
+        self.logger.info('%s fetching time: %ssec', mode, time.time() - s)
 
         return denested_responses
 
@@ -440,14 +601,20 @@ class Pushpull:
         """
         assert type(inp) is list
 
+        # resolver picked once per call instead of matching `duplicate_action` for every dupe
+        resolve = self.dupe_resolvers.get(duplicate_action)
+        if resolve is None:
+            raise Exception(f'invalid parameter for `duplicate_action`: '
+                            f"should be one of ['newest', 'oldest', 'remove', 'keep_original', 'keep_removed']")
+
         dupes = dict()
         indexed = dict()
         for ent in inp:
             if ent['id'] in indexed:
-                self.logger.info(f"dupe detected for {ent['id']}")
+                self.logger.info("dupe detected for %s", ent['id'])
 
                 if ent['id'] in dupes:  # when there's more than 3 duplicates
-                    self.logger.debug(f"{ent['id']} multiple entry for dupe")
+                    self.logger.debug("%s multiple entry for dupe", ent['id'])
                     dupes[ent['id']].append(ent)
                 else:  # making new entry for dupe
                     dupes[ent['id']] = [indexed[ent['id']]] + [ent]
@@ -458,35 +625,16 @@ class Pushpull:
             else:
                 indexed[ent['id']] = ent
 
-        # duplicate_action: ['newest', 'oldest', 'remove', 'keep_original', 'keep_removed']
+        # duplicate_action: replace each placeholder with the resolved version,
+        # or delete the submission/comment when nothing was picked
         for link_id, v in dupes.items():
-            match duplicate_action:
-                case 'newest':
-                    indexed[link_id] = v[0]
-                case 'oldest':
-                    indexed[link_id] = v[-1]
-                case 'remove':
-                    del indexed[link_id]
-                case 'keep_original':
-                    for post in v:
-                        if not self.is_deleted(post):
-                            indexed[link_id] = post  # default keeping the newest undeleted version for now
-                case 'keep_removed':
-                    for post in v:
-                        if self.is_deleted(post):
-                            indexed[link_id] = post  # default keeping the newest deleted version for no
-                case _:
-                    raise Exception(f'invalid parameter for `duplicate_action`: '
-                                    f"should be one of ['newest', 'oldest', 'remove', 'keep_original', 'keep_removed']")
-
-        # delete all the submission/comment that has placeholders remaining
-        def alert_dupe(item):
-            key, value = item
-            if value == 'dupe':
-                self.logger.warning(f'failed `is_deleted` detection. deleting {key} from results!')
-                return False
-            return True
-        indexed = {k: v for k, v in indexed.items() if alert_dupe((k, v))}
+            post = resolve(v)
+            if post is not None:
+                indexed[link_id] = post
+                continue
+            if duplicate_action != 'remove':
+                self.logger.warning('failed `is_deleted` detection. deleting %s from results!', link_id)
+            del indexed[link_id]
 
         """
         so the is_deleted function sometimes return all the dupes as either all False or True. 
@@ -498,10 +646,6 @@ class Pushpull:
         TODO: improve the is_deleted function or make it so that it'll detect and choose whatever appropriate.
         """
 
-        for v in indexed.values():  # check if I didn't leave placeholders behind
-            assert type(v) is dict, (f'indexed value came out as <{type(v)}: {v}> and is not `dict`,'
-                                     f' perhaps placeholder is not removed?')
-
         return indexed, dupes
 
     def _check_params(self, **parameters) -> str:
@@ -511,12 +655,12 @@ class Pushpull:
 
             match k:
                 case 'duplicate_action':
-                    assert v in ['newest', 'oldest', 'remove', 'keep_original', 'keep_removed'], \
+                    assert v in self.DUPLICATE_ACTIONS, \
                         "'duplicates' should be one of ['newest', 'oldest', 'remove', 'keep_original', 'keep_removed']"
                 case 'sort':
-                    assert v in ['desc', 'asc'], "'sort' should be one of ['desc', 'asc']"
+                    assert v in self.SORTS, "'sort' should be one of ['desc', 'asc']"
                 case 'sort_type':
-                    assert v in ['created_utc', 'score', 'num_comments'], \
+                    assert v in self.SORT_TYPES, \
                         "'sort_type' should be one of ['created_utc', 'score', 'num_comments', 'created_utc']"
                 case 'size':
                     if v > 100:
@@ -554,7 +698,7 @@ class Pushpull:
          - contain deleted or removed
         Examples: '[Deleted By User]' '[removed]' '[Removed by Reddit]'
         """
-        if any(json_obj.get(field) is not None for field in ['removed_by_category', 'removal_reason']):
+        if any(json_obj.get(field) is not None for field in ('removed_by_category', 'removal_reason')):
             return True
 
         author = json_obj.get('author')
@@ -568,8 +712,9 @@ class Pushpull:
             return True
 
         # Deleted or removed posts/comments often have specific text markers
-        if re.match(r"\[.*\]", text) and len(text) <= 100 and any(
-                term in text.lower() for term in ['deleted', 'removed']):
+        # cheap length check first, the regex only runs on short texts
+        if len(text) <= 100 and DELETED_PATTERN.match(text) and any(
+                term in text.lower() for term in ('deleted', 'removed')):
             return True
 
         return False
@@ -585,19 +730,29 @@ class Pushpull:
         if mode == 'submission':
             assert q_type == 'ids', "`q_type` can't be anything other than `ids` when `mode` is in `submission`"
         headers = dict() if not headers else headers
+        # defensive copy, so setting the queued id below never writes into the caller's dict
+        params = dict(params)
 
-        results = list()
-        while not q.empty():  # if Queue is empty, end thread
-
+        pages = list()  # one entry per response, flattened once when the queue is drained
+        while True:
             # retrieve an ID from the queue and set that as the link_id reqeust param
-            self.logger.info(f't-{thread_id}: {q.qsize()} {mode}s{" groups" if q_type == "link_id" else ""} left')
-            params[q_type] = q.get()
+            # `get_nowait` instead of checking `empty()` then `get()`: another thread can take the last id
+            # in between, which would leave this one blocked on `get()` forever
+            try:
+                params[q_type] = q.get_nowait()
+            except Empty:  # if Queue is empty, end thread
+                break
+
+            # progress goes to INFO every 10 ids (DEBUG otherwise), formatted lazily by the logger
+            left = q.qsize() + 1
+            self.logger.log(logging.INFO if left % 10 == 0 else logging.DEBUG, 't-%s: %s %ss%s left',
+                            thread_id, left, mode, ' groups' if q_type == 'link_id' else '')
 
             # make a request using the new param
-            self.logger.debug(f't-{thread_id}: making request')
-            results += self._make_request(mode, params, thread_id, headers)
+            self.logger.debug('t-%s: making request', thread_id)
+            pages.append(self._make_request(mode, params, thread_id, headers))
 
-        return results, thread_id
+        return list(chain.from_iterable(pages)), thread_id
 
     def _make_request_from_timeframe(self, mode: str, params, thread_id, headers=None) -> (list, int):
         assert (type(params['before']), type(params['after'])) == (int, int), \
@@ -605,33 +760,53 @@ class Pushpull:
 
         headers = dict() if not headers else headers
 
-        results = list()
+        # keep each page as-is and flatten once at the end, instead of growing one list per page
+        pages = list()
+        # the pivot epoch and the ids already received for it. the next request overlaps that epoch
+        # (`before` is exclusive) so entries sharing it aren't skipped, and those ids are dropped from it
+        pivot, pivot_ids = None, set()
         while True:
-            self.logger.debug(f't-{thread_id}: making request')
-            result = self._make_request(mode, params, thread_id, headers)
-
-            if not len(result):  # when result is empty, finish scraping
-                self.logger.info(f't-{thread_id}: finished.')
-                return results, thread_id
+            self.logger.debug('t-%s: making request', thread_id)
+            raw = self._make_request(mode, params, thread_id, headers)
+            # a short page means the timeframe is exhausted, no need for another (empty) round-trip
+            last_page = len(raw) < params.get('size', 100)
+            result = [ent for ent in raw if ent['id'] not in pivot_ids] if pivot_ids else raw
+
+            if not len(result):
+                if not last_page:
+                    # a full page of nothing but already-seen ids: more entries share the pivot epoch than
+                    # fit in one page, so overlapping it again would return the same page forever.
+                    # step past the saturated epoch and keep going with the rest of the timeframe
+                    # the entries at that epoch that never fit in a page are lost, so say so at the default level
+                    self.logger.warning('t-%s: more than a full page of entries share epoch %s, moving past it '
+                                        'after %s of them - the rest at that epoch are skipped',
+                                        thread_id, pivot, len(pivot_ids))
+                    params['before'] = pivot
+                    pivot, pivot_ids = None, set()
+                    continue
+
+                # when result is empty (or nothing new past the pivot), finish scraping
+                self.logger.info('t-%s: finished.', thread_id)
+                return list(chain.from_iterable(pages)), thread_id
 
             try:
                 # set new pivot, result always returns starting from most-recent
-                self.logger.debug(f't-{thread_id}: getting new pivot')
-                params['before'] = round(float(result[-1]['created_utc']))
-
-                if len(results):  # if results not empty, start 'omissions within same epoch' detection
-                    pass
-                    # TODO: add 'omissions within same epoch' detection part here
-                    # get the last id from the result
-                    # overlap the `after` for 1 epoch for the next request
-                    # if (the last id) > (first id from second request) then start from (the last id)
+                self.logger.debug('t-%s: getting new pivot', thread_id)
+                last_epoch = round(float(result[-1]['created_utc']))
+                if last_epoch != pivot:
+                    pivot, pivot_ids = last_epoch, set()
+                pivot_ids.update(ent['id'] for ent in result if round(float(ent['created_utc'])) == pivot)
+                params['before'] = pivot + 1
 
             except KeyError as err:
                 with open(os.path.join(self.cwd, "err_dump.json"), "w", encoding='utf-8') as f:
                     json.dump(result, f, indent=4)
                 raise Exception(f't-{thread_id}: date format problem from submission. (dumped file):\n{err}')
 
-            results += result
+            pages.append(result)
+            if last_page:
+                self.logger.info('t-%s: finished.', thread_id)
+                return list(chain.from_iterable(pages)), thread_id
 
 
 if __name__ == '__main__':
@@ -1,20 +1,64 @@
-import requests
 from collections import defaultdict
 import re
-import time
 import os
 import logging
-from typing import List
+from types import MappingProxyType
+from urllib.parse import urlencode
+
+
+# shared by every field that accepts a `<x` / `>x` comparison (score, num_comments)
+OP_PATTERN = re.compile(r"^(<|>)\d+$")
+
+
+def _assert_op(val: str) -> bool:
+    return True if OP_PATTERN.match(val) else False
 
 
 class PullPushAsync:
+    # {parameter : (accepted_type, assertion_func)} key, val pair
+    # built once here instead of on every `_process_params` call, read-only so it can't drift between instances
+    COMMENT_PARAMS = MappingProxyType({
+        'q': (str, None),
+        'ids': (list, None),
+        'size': (int, lambda x: x <= 100),
+        'sort': (str, lambda x: x in {"asc", "desc"}),
+        'sort_type': (str, lambda x: x in {"score", "num_comments", "created_utc"}),
+        'author': (str, None),
+        'subreddit': (str, None),
+        'after': (int, None),
+        'before': (int, None),
+        'link_id': (str, None)
+    })
+
+    SUBMISSION_PARAMS = MappingProxyType({
+        'ids': (list, None),
+        'q': (str, None),
+        'title': (str, None),
+        'selftext': (str, None),
+        'size': (int, lambda x: x <= 100),
+        'sort': (str, lambda x: x in {"asc", "desc"}),
+        'sort_type': (str, lambda x: x in {"score", "num_comments", "created_utc"}),
+        'author': (str, None),
+        'subreddit': (str, None),
+        'after': (int, None),
+        'before': (int, None),
+        'score': (str, _assert_op),
+        'num_comments': (str, _assert_op),
+        'over_18': (bool, None),
+        'is_video': (bool, None),
+        'locked': (bool, None),
+        'stickied': (bool, None),
+        'spoiler': (bool, None),
+        'contest_mode': (bool, None)
+    })
+
     def __init__(self,
                  sleep_sec: float = 1,
                  backoff_sec: float = 3,
                  max_retries: float = 5,
                  timeout: float = 10,
                  pace_mode: str = 'auto-hard',
-                 cwd=os.getcwd(),
+                 cwd: str = None,
                  log_stream_level: str = 'INFO',
                  log_level: str = 'DEBUG',
                  duplicate_action: str = 'keep_newest',
@@ -49,6 +93,11 @@ class PullPushAsync:
         self.SUBMISSION_URI = 'https://api.pullpush.io/reddit/search/submission/'
         self.COMMENT_URI = 'https://api.pullpush.io/reddit/search/comment/'
         self.DIAGNOSTIC_URI = "https://api.pullpush.io/ping"
+        # (scheme, base URI) per `_process_params` mode, resolved once here
+        self.endpoints = {
+            'comments': (self.COMMENT_PARAMS, self.COMMENT_URI),
+            'submissions': (self.SUBMISSION_PARAMS, self.SUBMISSION_URI),
+        }
         # self.last_refilled = time.time()
 
         assert pace_mode in ['auto-soft', 'auto-hard', 'manual']
@@ -62,12 +111,14 @@ class PullPushAsync:
         assert duplicate_action in ['keep_newest', 'keep_oldest', 'remove', 'keep_original', 'keep_removed'], \
             ("`duplicate_action` should be one of "
              "['keep_newest', 'keep_oldest', 'remove', 'keep_original', 'keep_removed']")
+        # resolved once here, so `_preprocess_json` reads it off the instance instead of being handed it per call
+        self.duplicate_action = duplicate_action
 
         self.sleep_sec = sleep_sec
         self.backoff_sec = backoff_sec
         self.max_retries = max_retries
         self.timeout = timeout
-        self.cwd = cwd
+        self.cwd = cwd if cwd is not None else os.getcwd()  # resolved per instance, not once at import
 
         # logger stuffs
         log_levels = ['NOTSET', 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
@@ -76,16 +127,23 @@ class PullPushAsync:
 
         self.logger = logging.getLogger('BALogger')
         self.logger.setLevel(log_level)
-        logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s:%(message)s',
-                            filename=os.path.join(self.cwd, 'scrape_log.log'),
-                            filemode='w',
-                            level=logging.DEBUG)
+        # only the first instance sets up the log file, basicConfig is a no-op after that anyway
+        if not logging.root.handlers:
+            logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s:%(message)s',
+                                filename=os.path.join(self.cwd, 'scrape_log.log'),
+                                filemode='w',
+                                level=logging.DEBUG)
 
         # create console logging handler and set level
-        ch = logging.StreamHandler()
+        # the logger is global, so reuse the handler a previous instance attached
+        # instead of adding another one and printing every message once more per instance
+        ch = next((h for h in self.logger.handlers if h.get_name() == 'BAconsole'), None)
+        if ch is None:
+            ch = logging.StreamHandler()
+            ch.set_name('BAconsole')
+            ch.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
+            self.logger.addHandler(ch)
         ch.setLevel(log_stream_level)
-        ch.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
-        self.logger.addHandler(ch)
 
     def get_submissions(self, **params):
         pass
@@ -103,57 +161,13 @@ class PullPushAsync:
 
         TODO: I forgot what the endpoint did when it had no params...
         """
-        def assert_op(val: str) -> bool:
-            pattern = r"^(<|>)\d+$"
-            return True if re.match(pattern, val) else False
-
-        # {parameter : [accepted_type, assertion_func]} key, val pair
-        comment_params = {
-            'q': [str, None],
-            'ids': [list, None],
-            'size': [int, lambda x: x <= 100],
-            'sort': [str, lambda x: x in ["asc", "desc"]],
-            'sort_type': [str, lambda x: x in ["score", "num_comments", "created_utc"]],
-            'author': [str, None],
-            'subreddit': [str, None],
-            'after': [int, None],
-            'before': [int, None],
-            'link_id': [str, None]
-        }
-
-        submission_params = {
-            'ids': [list, None],
-            'q': [str, None],
-            'title': [str, None],
-            'selftext': [str, None],
-            'size': [int, lambda x: x <= 100],
-            'sort': [str, lambda x: x in ["asc", "desc"]],
-            'sort_type': [str, lambda x: x in ["score", "num_comments", "created_utc"]],
-            'author': [str, None],
-            'subreddit': [str, None],
-            'after': [int, None],
-            'before': [int, None],
-            'score': [str, assert_op],
-            'num_comments': [str, assert_op],
-            'over_18': [bool, None],
-            'is_video': [bool, None],
-            'locked': [bool, None],
-            'stickied': [bool, None],
-            'spoiler': [bool, None],
-            'contest_mode': [bool, None]
-        }
-
         # setting up the mode
-        if mode == 'comments':
-            scheme = comment_params
-            uri_string = self.COMMENT_URI
-        elif mode == 'submissions':
-            scheme = submission_params
-            uri_string = self.SUBMISSION_URI
-        else:
+        try:
+            scheme, uri_string = self.endpoints[mode]
+        except KeyError:
             raise Exception('wrong `mode` param for `_process_params`')
 
-        # assertion stuffs using the `submission_params` and `comment_params`
+        # assertion stuffs using the `SUBMISSION_PARAMS` and `COMMENT_PARAMS`
         for k, v in params.items():
             if (dat := scheme.get(k)) is not None:
                 assert isinstance(v, dat[0]), f'Param "{v}" should be {dat[0]}'
@@ -173,7 +187,9 @@ class PullPushAsync:
             # if `param` is `bool`, the resulting string would be 'True', 'False' not 'true', 'false' we want
             return str(param_v).lower() if isinstance(param_v, bool) else str(param_v)
 
-        return uri_string + '?' + '&'.join([f'{k}={param2str(k, v)}' for k, v in params.items()])
+        # one `urlencode` pass, which also escapes `&`, `=`, spaces etc. in free text like `q`
+        # `<`, `>` (score/num_comments ops) and `,` (ids) are left as is, the API takes them raw
+        return uri_string + '?' + urlencode({k: param2str(k, v) for k, v in params.items()}, safe='<>,')
 
     def _make_request(self, uri: str) -> defaultdict:
         pass
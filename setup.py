@@ -26,6 +26,7 @@ setup(
     long_description=LONG_DESCRIPTION,
     packages=find_packages(),
     install_requires=['requests'],
+    extras_require={'fast': ['orjson']},
 
     keywords=['reddit scraper', 'reddit', 'scraper', 'pullpush', 'wrapper'],
     classifiers=[
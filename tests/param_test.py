@@ -3,8 +3,10 @@ from BAScraper.BAScraper_async import PullPushAsync
 
 
 class TestProcessParams(unittest.TestCase):
-    def setUp(self):
-        self.scraper = PullPushAsync()
+    @classmethod
+    def setUpClass(cls):
+        # `_process_params` doesn't touch instance state, one scraper (and one logger setup) covers every test
+        cls.scraper = PullPushAsync()
 
     def test_valid_comment_params(self):
         params = {
@@ -48,6 +50,15 @@ class TestProcessParams(unittest.TestCase):
         result = self.scraper._process_params('submissions', **params)
         self.assertEqual(expected_uri, result)
 
+    def test_param_value_escaping(self):
+        params = {
+            'q': 'cats & dogs',
+            'author': 'a=b'
+        }
+        expected_uri = "https://api.pullpush.io/reddit/search/comment/?q=cats+%26+dogs&author=a%3Db"
+        result = self.scraper._process_params('comments', **params)
+        self.assertEqual(expected_uri, result)
+
     def test_invalid_param_name(self):
         params = {
             'invalid_param': 'example'
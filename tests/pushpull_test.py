@@ -0,0 +1,222 @@
+import json
+import time
+import unittest
+from datetime import timedelta
+from types import SimpleNamespace
+import requests
+from BAScraper.BAScraper import Pushpull
+
+
+class FakeSession:
+    """
+    stands in for `requests.Session`, serves `rows` (newest first) like the PullPush endpoint does:
+    `after` < created_utc < `before`, at most `size` rows per page
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = list()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls.append(dict(params))
+        page = [row for row in self.rows
+                if params['after'] < row['created_utc'] < params['before']][:params['size']]
+        return SimpleNamespace(status_code=200, ok=True, headers={}, elapsed=timedelta(0),
+                               content=json.dumps({'data': page}).encode(), text='')
+
+    def close(self):
+        pass
+
+
+def make_rows(epochs):
+    return [{'id': f'r{i}', 'created_utc': epoch} for i, epoch in enumerate(epochs)]
+
+
+class TestTimeframePagination(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.scraper = Pushpull(sleepsec=0, pace_mode='manual', log_level='ERROR')
+
+    def fetch(self, rows, size, after=0, before=10_000):
+        self.scraper.session = FakeSession(rows)
+        params = {'sort': 'desc', 'size': size, 'after': after, 'before': before}
+        result, _ = self.scraper._make_request_from_timeframe('submission', params, thread_id=0)
+        return result, self.scraper.session.calls
+
+    def test_distinct_epochs(self):
+        rows = make_rows(range(1017, 1000, -1))  # 17 rows, one per epoch
+        result, _ = self.fetch(rows, size=5)
+        self.assertEqual([row['id'] for row in rows], [row['id'] for row in result])
+
+    def test_tied_epochs_within_page(self):
+        # 3 rows share the epoch a page boundary lands on, none of them should be skipped or repeated
+        rows = make_rows([1009, 1008, 1007, 1006, 1005, 1005, 1005, 1004, 1003, 1002])
+        result, _ = self.fetch(rows, size=5)
+        self.assertEqual([row['id'] for row in rows], [row['id'] for row in result])
+
+    def test_saturated_epoch_keeps_paging(self):
+        # more rows share one epoch than fit in a page, the older rows past it must still be fetched
+        rows = make_rows([1000] * 7 + list(range(999, 989, -1)))
+        with self.assertLogs('BAlogger', level='WARNING') as logs:
+            result, _ = self.fetch(rows, size=5)
+        self.assertTrue(any('epoch 1000' in line and 'after 5 of them' in line for line in logs.output))
+        ids = [row['id'] for row in result]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(15, len(ids))  # the 2 tied rows that never fit in a page are the only ones lost
+        self.assertEqual([row['id'] for row in rows[7:]], ids[5:])
+
+    def test_short_page_stops(self):
+        # 12 rows with size 5: pages of 5, 5, 2 and no extra (empty) request after the short one
+        result, calls = self.fetch(make_rows(range(1012, 1000, -1)), size=5)
+        self.assertEqual(12, len(result))
+        self.assertEqual(3, len(calls))
+
+    def test_after_does_not_drift(self):
+        # `after` is shifted by one for every request, but never cumulatively across pages or retries
+        _, calls = self.fetch(make_rows(range(1017, 1000, -1)), size=5, after=900)
+        self.assertTrue(len(calls) > 1)
+        self.assertTrue(all(call['after'] == 899 for call in calls))
+
+
+class ScriptedSession:
+    """
+    stands in for `requests.Session`, answers each request with the next (status, body[, headers]) of `script`
+    """
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls += 1
+        status, body, *headers = self.script.pop(0)
+        response = requests.Response()
+        response.headers.update(*headers)
+        response.status_code = status
+        response._content = body.encode()
+        response.url = url
+        response.elapsed = timedelta(0)
+        return response
+
+    def close(self):
+        pass
+
+
+class TestRequestErrors(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.scraper = Pushpull(sleepsec=0, backoffsec=0, max_retries=3, pace_mode='manual', log_level='CRITICAL')
+
+    def request(self, script):
+        self.scraper.session = ScriptedSession(script)
+        return self.scraper._make_request('submission', {'size': 5}, thread_id=0)
+
+    def test_client_error_raises_without_retry(self):
+        with self.assertRaises(Exception) as context:
+            self.request([(404, 'no such endpoint')])
+        self.assertIn('404', str(context.exception))
+        self.assertIn('no such endpoint', str(context.exception))
+        self.assertEqual(1, self.scraper.session.calls)
+
+    def test_server_error_is_retried(self):
+        result = self.request([(503, 'busy'), (502, 'busy'), (200, '{"data": [{"id": "a"}]}')])
+        self.assertEqual([{'id': 'a'}], result)
+        self.assertEqual(3, self.scraper.session.calls)
+
+    def test_persistent_server_error_raises(self):
+        with self.assertRaises(Exception) as context:
+            self.request([(500, 'oops')] * 3)
+        self.assertIn('giving up', str(context.exception))
+
+    def test_missing_data_field_raises(self):
+        # a page without `data` is retried, but never silently turned into an empty (= finished) page
+        self.assertEqual([], self.request([(200, '{"error": "x"}'), (200, '{"data": []}')]))
+        with self.assertRaises(Exception) as context:
+            self.request([(200, '{"error": "x"}')] * 3)
+        self.assertIn('no `data` field', str(context.exception))
+
+    def test_persistent_rate_limit_raises(self):
+        # every attempt rate limited: has to fail loudly, an empty page would end the paging worker early
+        with self.assertRaises(Exception) as context:
+            self.request([(429, 'slow down')] * self.scraper.max_retries)
+        self.assertIn('429', str(context.exception))
+        self.assertEqual(self.scraper.max_retries, self.scraper.session.calls)
+
+    def test_rate_limit_is_retried(self):
+        result = self.request([(429, 'slow down'), (200, '{"data": [{"id": "a"}]}')])
+        self.assertEqual([{'id': 'a'}], result)
+
+
+class TestRateLimitReset(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.scraper = Pushpull(backoffsec=3, log_level='CRITICAL')
+
+    def test_seconds(self):
+        self.assertEqual(12, self.scraper.reset_wait({'X-RateLimit-Reset': '12'}, 1))
+
+    def test_epoch(self):
+        wait = self.scraper.reset_wait({'X-RateLimit-Reset': str(time.time() + 20)}, 1)
+        self.assertTrue(15 < wait <= 20)
+
+    def test_clamped(self):
+        self.assertEqual(self.scraper.refill_second, self.scraper.reset_wait({'X-RateLimit-Reset': '99999'}, 1))
+        self.assertEqual(self.scraper.refill_second,
+                         self.scraper.reset_wait({'X-RateLimit-Reset': str(time.time() + 10 ** 9)}, 1))
+        self.assertEqual(0, self.scraper.reset_wait({'X-RateLimit-Reset': str(time.time() - 5)}, 1))
+
+    def test_missing_or_bad(self):
+        self.assertEqual(6, self.scraper.reset_wait({}, 2))
+        self.assertEqual(6, self.scraper.reset_wait({'X-RateLimit-Reset': 'soon'}, 2))
+        self.assertEqual(6, self.scraper.reset_wait({'X-RateLimit-Reset': 'nan'}, 2))
+
+
+class TestPoolSync(unittest.TestCase):
+    def test_remaining_counts_the_request_once(self):
+        scraper = Pushpull(sleepsec=0, log_level='CRITICAL')
+        scraper.session = ScriptedSession([(200, '{"data": []}', {'X-RateLimit-Remaining': '3'})])
+        scraper._make_request('submission', {'size': 5})
+        # the server says 3 left after this request, and the pacer already took this request's token
+        self.assertAlmostEqual(3, scraper.pool_amount, places=1)
+
+
+class TestPreprocessJson(unittest.TestCase):
+    # newest first, like the API returns them: `a` edited, `c` deleted later on, `d` a triple with a removed middle
+    a1 = {'id': 'a', 'author': 'u', 'body': 'edited text'}
+    b = {'id': 'b', 'author': 'u', 'body': 'only once'}
+    a2 = {'id': 'a', 'author': 'u', 'body': 'original text'}
+    c1 = {'id': 'c', 'author': '[deleted]', 'body': '[deleted]'}
+    c2 = {'id': 'c', 'author': 'u', 'body': 'c original'}
+    d1 = {'id': 'd', 'author': 'u', 'body': 'd v3'}
+    d2 = {'id': 'd', 'author': 'u', 'body': '[removed]'}
+    d3 = {'id': 'd', 'author': 'u', 'body': 'd v1'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scraper = Pushpull(log_level='CRITICAL')
+        cls.rows = [cls.a1, cls.b, cls.a2, cls.c1, cls.c2, cls.d1, cls.d2, cls.d3]
+
+    def test_duplicate_actions(self):
+        expected_results = {
+            'newest': {'a': self.a1, 'b': self.b, 'c': self.c1, 'd': self.d1},
+            'oldest': {'a': self.a2, 'b': self.b, 'c': self.c2, 'd': self.d3},
+            'remove': {'b': self.b},
+            'keep_original': {'a': self.a2, 'b': self.b, 'c': self.c2, 'd': self.d3},
+            'keep_removed': {'b': self.b, 'c': self.c1, 'd': self.d2},  # `a` was never deleted, so it's dropped
+        }
+        for duplicate_action, expected_result in expected_results.items():
+            with self.subTest(duplicate_action=duplicate_action):
+                result, dupes = self.scraper.preprocess_json(list(self.rows), duplicate_action)
+                self.assertEqual(list(expected_result.items()), list(result.items()))  # positions kept too
+                self.assertEqual({'a': [self.a1, self.a2], 'c': [self.c1, self.c2],
+                                  'd': [self.d1, self.d2, self.d3]}, dupes)
+
+    def test_invalid_duplicate_action_fails_before_fetching(self):
+        self.scraper.session = ScriptedSession([])
+        for get in (self.scraper.get_submissions, self.scraper.get_comments):
+            with self.subTest(get=get.__name__):
+                with self.assertRaises(AssertionError):
+                    get(duplicate_action='keep_newest', subreddit='test')
+        self.assertEqual(0, self.scraper.session.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()